@@ -4,29 +4,38 @@ Script that calculates the lambda, mu, and nu values for each gene over all samp
 import sys
 import os
 import argparse
-import multiprocessing as mp
 import pandas as pd
 
 sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
-from tbk.inference import maximum_likelihood
+from tbk.batch import fit_genes
+from tbk.triage import summary, triage
 
 parser = argparse.ArgumentParser(description='Description')
 parser.add_argument('file', type=str, help='comma separated count file')
 parser.add_argument('--nworkers', default=1, type=int, help='Output dir for image')
+parser.add_argument('--min-nonzero', default=3, type=int,
+                    help='Skip genes expressed in less cells than this')
+parser.add_argument('--max-dispersion', default=1e3, type=float,
+                    help='Fit genes with a larger variance / mean cheaply')
 
 args = parser.parse_args()
 
 # load the data
 data = pd.read_csv(args.file, sep=',', index_col=0)
 
+# decide which genes are worth fitting
+result = triage(data.values, min_nonzero=args.min_nonzero, max_dispersion=args.max_dispersion)
+print(', '.join(f'{key}: {value}' for key, value in summary(result).items()))
+
 # estimate the values
-with mp.Pool(processes=args.nworkers) as pool:
-    params = pool.starmap(maximum_likelihood, [(products,) for products in data.values])
+report = {}
+params = fit_genes(data.values, nworkers=args.nworkers, result=result, report=report)
+for pid, worker in report['workers'].items():
+    print(f"worker {pid}: {worker['tasks']} genes, {100 * worker['utilization']:.0f}% utilization")
 
 # save
-df = pd.DataFrame(index=data.index, columns=['k_on', 'k_off', 'k_syn'])
-for index, rowname in enumerate(df.index):
-    df.iloc[index] = params[index]
+df = pd.DataFrame(params, index=data.index, columns=['k_on', 'k_off', 'k_syn'])
+df['triage'] = result.decisions
 
 df = df.fillna('---')
 df.to_csv(f'{os.path.splitext(args.file)[0]}_params.csv')
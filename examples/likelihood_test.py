@@ -1,41 +1,52 @@
 """
-Script that calculates the lambda, mu, and nu values of two experimental conditions, and the chance
-whether or not those parameters are different.
+Script that calculates the lambda, mu, and nu values of two or more experimental conditions, and
+the chance whether or not those parameters are different between pairs (contrasts) of conditions.
 """
 import sys
 import os
 import argparse
-import multiprocessing as mp
 import pandas as pd
-import numpy as np
 
 sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
-from tbk.inference import likelihood_ratio_test
+from tbk.batch import differential_kinetics
 
 
 parser = argparse.ArgumentParser(description='Description')
-parser.add_argument('file_1', type=str, help='comma separated count input file')
-parser.add_argument('file_2', type=str, help='comma separated count input file')
+parser.add_argument('files', type=str, nargs='+', help='comma separated count input files')
+parser.add_argument('--contrasts', type=str, nargs='+', default=None,
+                    help='pairs of conditions to compare, as 1-based file numbers (e.g. 1:2 1:3), '
+                         'by default the first file is compared to every other file')
 parser.add_argument('--outfile', default='likelihood_ratio_test', type=str, help='Name of the output file(csv)')
 parser.add_argument('--nworkers', default=1, type=int, help='Output dir for image')
 args = parser.parse_args()
 
-data_1 = pd.read_csv(args.file_1, sep=',', index_col=0)
-data_2 = pd.read_csv(args.file_2, sep=',', index_col=0)
+assert len(args.files) >= 2, "At least two files are needed"
+data = [pd.read_csv(file, sep=',', index_col=0) for file in args.files]
 
-assert list(data_1.index) == list(data_2.index), "Files should contain the same genes " \
-                                                 "(in the same order)"
+assert all(list(data[0].index) == list(df.index) for df in data), "Files should contain the same " \
+                                                                  "genes (in the same order)"
 
-values_1 = np.sort(data_1.values, axis=1)
-values_2 = np.sort(data_2.values, axis=1)
+if args.contrasts is None:
+    contrasts = [(0, i) for i in range(1, len(data))]
+else:
+    contrasts = [tuple(int(condition) - 1 for condition in contrast.split(':'))
+                 for contrast in args.contrasts]
 
-with mp.Pool(processes=args.nworkers) as pool:
-    params = pool.starmap(likelihood_ratio_test, [(vals1, vals2) for vals1, vals2 in zip(values_1, values_2)])
+params, pvalues = differential_kinetics([df.values for df in data], contrasts,
+                                        nworkers=args.nworkers)
 
-params = [[*sublists[0], *sublists[1], *sublists[2]] for sublists in params]
-df = pd.DataFrame(params, index=data_1.index, columns=['1 k_on', '1 k_off', '1 k_syn',
-                                                       '2 k_on', '2 k_off', '2 k_syn',
-                                                       'p k_on', 'p k_off', 'p k_syn'])
+for condition_1, condition_2 in contrasts:
+    df = pd.DataFrame(index=data[0].index)
+    for label, values in [('1', params[condition_1]), ('2', params[condition_2]),
+                          ('p', pvalues[(condition_1, condition_2)])]:
+        for i, param in enumerate(['k_on', 'k_off', 'k_syn']):
+            df[f'{label} {param}'] = values[:, i]
 
-df = df.fillna('---')
-df.to_csv(args.outfile)
+    # with a single contrast write to outfile, otherwise add the file numbers to its name
+    outfile = args.outfile
+    if len(contrasts) > 1:
+        root, ext = os.path.splitext(args.outfile)
+        outfile = f'{root}_{condition_1 + 1}_vs_{condition_2 + 1}{ext}'
+
+    df = df.fillna('---')
+    df.to_csv(outfile)
@@ -0,0 +1,36 @@
+"""
+Script that simulates the markovian model over a grid of lambda, mu, nu, and delta values, and
+reports how well the maximum likelihood estimates recover those parameters.
+"""
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
+from tbk.sweep import parameter_grid, parameter_sweep
+
+parser = argparse.ArgumentParser(description='Description')
+parser.add_argument('--lambd', nargs='+', default=[1.0], type=float, help='lambda values')
+parser.add_argument('--mu', nargs='+', default=[1.0], type=float, help='mu values')
+parser.add_argument('--nu', nargs='+', default=[10.0], type=float, help='nu values')
+parser.add_argument('--delta', nargs='+', default=[1.0], type=float, help='delta values')
+parser.add_argument('--ncells', default=100, type=int, help='Number of cells per dataset')
+parser.add_argument('--nreplicates', default=10, type=int, help='Number of datasets per point')
+parser.add_argument('--time', default=100, type=float, help='Simulated time per cell')
+parser.add_argument('--no-coverage', action='store_true', help='Skip the confidence intervals')
+parser.add_argument('--cache', default='parameter_sweep.csv', type=str,
+                    help='csv file in which finished points are stored (and reused)')
+parser.add_argument('--seed', default=0, type=int,
+                    help='Seed of the simulations, only points with the same seed are reused')
+parser.add_argument('--outfile', default=None, type=str, help='Name of the output file(csv)')
+parser.add_argument('--nworkers', default=1, type=int, help='Number of processes')
+args = parser.parse_args()
+
+grid = parameter_grid(args.lambd, args.mu, args.nu, args.delta)
+df = parameter_sweep(grid, ncells=args.ncells, nreplicates=args.nreplicates, time=args.time,
+                     coverage=not args.no_coverage, nworkers=args.nworkers, cache=args.cache,
+                     seed=args.seed)
+
+if args.outfile is not None:
+    df.to_csv(args.outfile, index=False)
+print(df.to_string())
@@ -0,0 +1,108 @@
+"""
+Fit the parameters of many genes at once over a pool of workers.
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse
+
+from .inference import constrained_likelihood_ratio_test, maximum_likelihood
+from .schedule import balanced_starmap, fit_cost
+from .triage import CHEAP, FIT, Triage, triage
+
+
+def _row(vals, index: int) -> np.array:
+    """
+    Return a row (gene) of a dense or sparse (csr) matrix as a 1D array.
+    """
+    if scipy.sparse.issparse(vals):
+        return vals[index].toarray().ravel()
+    return np.asarray(vals[index])
+
+
+def fit_genes(vals, nworkers: int = 1, result: Triage = None, cheap_maxiter: int = 20,
+              report: dict = None) -> np.ndarray:
+    """
+    Get the most likely BP3 parameters of every row (gene) of a dense or sparse matrix.
+
+    Genes are triaged first (see tbk.triage), unless a triage result is passed. Only genes that are
+    fitted (cheaply or not) are sent to the workers, starting from their moment-based parameters.
+    Skipped genes get nan parameters. The fits are scheduled by their predicted cost (see
+    tbk.schedule), and when a dictionary is passed as report it is updated with the utilization of
+    the workers.
+    """
+    # not every sparse format supports indexing (e.g. coo, as returned by scipy.io.mmread)
+    if scipy.sparse.issparse(vals):
+        vals = scipy.sparse.csr_matrix(vals)
+
+    if result is None:
+        result = triage(vals)
+
+    genes = np.where(np.isin(result.decisions, [FIT, CHEAP]))[0]
+    tasks = [(_row(vals, gene), 'BP3', tuple(result.params[gene]),
+              cheap_maxiter if result.decisions[gene] == CHEAP else None)
+             for gene in genes]
+
+    costs = fit_cost(vals, result.moments)[genes]
+    # cheap fits stop after cheap_maxiter iterations, while full fits often take close to a hundred
+    costs[result.decisions[genes] == CHEAP] *= min(1, cheap_maxiter / 100)
+    fitted, utilization = balanced_starmap(maximum_likelihood, tasks, costs, nworkers)
+    if report is not None:
+        report.update(utilization)
+
+    params = np.full((vals.shape[0], 3), np.nan)
+    if len(genes):
+        params[genes] = fitted
+
+    return params
+
+
+def differential_kinetics(conditions: Sequence, contrasts: Sequence[Tuple[int, int]],
+                          nworkers: int = 1) \
+        -> Tuple[np.ndarray, Dict[Tuple[int, int], np.ndarray]]:
+    """
+    Test for every contrast (a, b) of conditions whether the parameters of each gene differ
+    between condition a and b through the likelihood ratio test (see likelihood_ratio_test).
+
+    The conditions are count matrices (dense or sparse) with the same genes in the same order.
+    Every (gene, condition) is fitted exactly once, no matter in how many contrasts the condition
+    is used, after which only the constrained refits of each contrast are done. Both steps are
+    spread over the workers by their predicted cost (see tbk.schedule).
+
+    Returns the parameters per condition (conditions x genes x 3), and per contrast the p-values
+    (genes x 3) of k_on, k_off, and k_syn.
+    """
+    conditions = [scipy.sparse.csr_matrix(vals) if scipy.sparse.issparse(vals) else vals
+                  for vals in conditions]
+    nr_genes = conditions[0].shape[0]
+    assert all(vals.shape[0] == nr_genes for vals in conditions), "conditions should contain the " \
+                                                                  "same genes"
+    used = sorted({condition for contrast in contrasts for condition in contrast})
+
+    # fit each (gene, condition) once
+    tasks = [(_row(conditions[condition], gene),) for condition in used for gene in range(nr_genes)]
+    costs = np.concatenate([fit_cost(conditions[condition]) for condition in used])
+    fitted, _ = balanced_starmap(maximum_likelihood, tasks, costs, nworkers)
+
+    params = np.full((len(conditions), nr_genes, 3), np.nan)
+    params[used] = np.array(fitted).reshape(len(used), nr_genes, 3)
+
+    # only do the constrained refits of each contrast, three per gene
+    tasks, costs, keys = [], [], []
+    for contrast in contrasts:
+        condition_1, condition_2 = contrast
+        costs_2 = fit_cost(conditions[condition_2])
+        for gene in range(nr_genes):
+            if np.isnan(params[[condition_1, condition_2], gene]).any():
+                continue
+            tasks.append((params[condition_1, gene], params[condition_2, gene],
+                          _row(conditions[condition_2], gene)))
+            costs.append(3 * costs_2[gene])
+            keys.append((tuple(contrast), gene))
+    probabilities, _ = balanced_starmap(constrained_likelihood_ratio_test, tasks, costs, nworkers)
+
+    pvalues = {tuple(contrast): np.full((nr_genes, 3), np.nan) for contrast in contrasts}
+    for (contrast, gene), probability in zip(keys, probabilities):
+        pvalues[contrast][gene] = probability
+
+    return params, pvalues
@@ -3,22 +3,55 @@ Collection of beta poisson (3 and 4) functions
 """
 import numpy as np
 import scipy.special
-import scipy.stats
 
 
-def beta_poisson3(alpha: float, beta: float, lambd: float, size: int = 1) -> np.array:
+def beta_poisson3(alpha: float, beta: float, lambd: float, size: int = 1,
+                  rng: np.random.Generator = None) -> np.array:
     """
     Generate data sampled from the beta poisson 3 distribution.
+
+    Samples are drawn from rng, or from the global np.random state when no rng is given.
     """
-    return np.random.poisson(lambd * np.random.beta(alpha, beta, size))
+    rng = rng if rng is not None else np.random
+    return rng.poisson(lambd * rng.beta(alpha, beta, size))
 
 
-def beta_poisson4(alpha: float, beta: float, lambda1: float, lambda2: float, size: int = 1) \
-        -> np.array:
+def beta_poisson4(alpha: float, beta: float, lambda1: float, lambda2: float, size: int = 1,
+                  rng: np.random.Generator = None) -> np.array:
     """
     Generate data sampled from the beta poisson 4 distribution.
     """
-    return lambda2 * beta_poisson3(alpha, beta, lambda1, size)
+    return lambda2 * beta_poisson3(alpha, beta, lambda1, size, rng)
+
+
+def _poisson_quadrature(x: np.ndarray, w: np.ndarray, lambd: float, uniques: np.ndarray) \
+        -> np.ndarray:
+    """
+    Calculate the sum over the sample points x of w * poisson.pmf(uniques, lambd * (x + 1) / 2).
+
+    The log pmf k * log(rate) - rate - log(k!) is calculated as
+    k * (log(rate) - log(k)) + (k - rate) - (log(k!) - k * log(k) + k), where the last term only
+    depends on k and is calculated once per unique value instead of once per sample point. Like
+    scipy.stats.poisson.pmf, the pmf is zero for values that are not non-negative integers, and a
+    rate of zero puts all probability on zero.
+    """
+    k = uniques.astype(np.float64)
+    valid = (k >= 0) & (k == np.floor(k))
+    k = np.where(valid, k, 0)
+    log_k = np.log(np.where(k > 0, k, 1))
+    stirling = scipy.special.gammaln(k + 1) - k * log_k + k
+
+    rate = lambd * (x + 1) / 2
+    k, log_k, stirling = (array[:, np.newaxis] for array in (k, log_k, stirling))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_pmf = k * (np.log(rate) - log_k) + (k - rate) - stirling
+
+    # k * log(rate) is nan for k = 0 and rate = 0, where the pmf is one
+    if np.any(rate == 0):
+        log_pmf[:, rate == 0] = np.where(k == 0, 0, -np.inf)
+    log_pmf[~valid] = -np.inf
+
+    return np.exp(log_pmf) @ w
 
 
 def beta_poisson4_log_likelihood(
@@ -41,8 +74,7 @@ def beta_poisson4_log_likelihood(
     x, w = scipy.special.j_roots(50, alpha=beta - 1, beta=alpha - 1)
 
     # estimate the integral
-    chances = np.sum(w*scipy.stats.poisson.pmf(uniques[..., np.newaxis], lambda1 * (x + 1) / 2),
-                     axis=1)
+    chances = _poisson_quadrature(x, w, lambda1, uniques)
 
     if np.any(np.isnan(chances)):
         return np.nan
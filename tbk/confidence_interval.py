@@ -12,16 +12,16 @@ import scipy.stats
 from .bp import beta_poisson_log_likelihood
 
 
-def _beta_poisson_log_likelihood_burst(params: np.array, vals: np.array) -> float:
+def _beta_poisson_log_likelihood_burst(params: np.array, uniques: np.ndarray,
+                                       counts: np.ndarray) -> float:
     """
     Calculate the negative sum of the log likelihood of values corrected for burst_size.
     """
     assert len(params) == 3 and isinstance(params, np.ndarray), "params should be of length 3 and "\
                                                                 "of type numpy.array"
-    assert len(vals.shape) == 1, "vals should be a 1D array"
     lambd, burst_size, nu = params
     mu = nu / burst_size
-    return beta_poisson_log_likelihood(np.array([lambd, mu, nu]), vals)
+    return beta_poisson_log_likelihood(np.array([lambd, mu, nu]), uniques, counts)
 
 
 def get_param_bound(param_name, original_params, original_bounds):
@@ -45,20 +45,22 @@ def get_param_bound(param_name, original_params, original_bounds):
     return param, bounds
 
 
-def fit(res, param_name, param, _vals, bounds):
+def fit(res, param_name, param, histogram, bounds):
     """
     Fit depending on which parameter we are using.
+
+    The histogram is the tuple (uniques, counts) of the values.
     """
     if param_name == 'burst_freq':
         res.x[0] = param
         bounds = ((param, param), bounds[1], bounds[2])
-        res = scipy.optimize.minimize(beta_poisson_log_likelihood, res.x, args=_vals,
+        res = scipy.optimize.minimize(beta_poisson_log_likelihood, res.x, args=histogram,
                                       method='L-BFGS-B', bounds=bounds)
     else:
         res.x[1] = param
         bounds = (bounds[0], (param, param), bounds[2])
         res = scipy.optimize.minimize(_beta_poisson_log_likelihood_burst, res.x,
-                                      args=_vals, method='L-BFGS-B', bounds=bounds)
+                                      args=histogram, method='L-BFGS-B', bounds=bounds)
 
     return res
 
@@ -81,6 +83,7 @@ def bounds_params(_params, _vals, param_name, alpha=0.05):
     assert param_name in ['burst_freq', 'burst_size']
     # take copies of values and params not to change them
     original_params = np.copy(_params); vals = np.copy(_vals)
+    histogram = np.unique(vals[~np.isnan(vals)], return_counts=True)
 
     # calculate the chi square cutoff
     cutoff = scipy.stats.chi2.ppf(1-alpha, 1) / 2
@@ -89,9 +92,9 @@ def bounds_params(_params, _vals, param_name, alpha=0.05):
     original_bounds = ((1e-3, 1e2), (1e-3, 1e3), (1e-3, 1e10))
 
     # re-estimate and store
-    res = scipy.optimize.minimize(beta_poisson_log_likelihood, original_params, args=vals,
+    res = scipy.optimize.minimize(beta_poisson_log_likelihood, original_params, args=histogram,
                                   method='L-BFGS-B', bounds=original_bounds)
-    original = copy.copy(res)
+    original = copy.deepcopy(res)
 
     # store our values
     subtract = (op.sub, [], [])
@@ -103,6 +106,9 @@ def bounds_params(_params, _vals, param_name, alpha=0.05):
         param, bound = get_param_bound(param_name, original_params, original_bounds)
         initial_param = param
 
+        # start each direction from the original fit, not from where the previous one ended
+        res = copy.deepcopy(original)
+
         # stepsize
         stepsize = 0.05 * param
 
@@ -116,7 +122,7 @@ def bounds_params(_params, _vals, param_name, alpha=0.05):
                 break
 
             try:
-                res = fit(res, param_name, param, _vals, bound)
+                res = fit(res, param_name, param, histogram, bound)
             except ValueError:
                 break
 
@@ -167,6 +173,23 @@ def bounds_params(_params, _vals, param_name, alpha=0.05):
         return np.array([initial_param, np.nan, np.nan]), values, ll_ratio
 
 
+def confidence_interval(param_estimate: np.array, vals: np.array, param_name: str) -> np.array:
+    """
+    Estimate the confidence interval for either the burst frequency or the burst size.
+
+    See method bounds_params for an extensive explanation of how the interval is estimated.
+
+    Returns np.array([most_likely, conf_low, conf_high]).
+    """
+    try:
+        confidence, *_ = bounds_params(param_estimate, vals, param_name)
+        return confidence
+    except Exception:
+        most_likely = param_estimate[0] if param_name == 'burst_freq' \
+            else param_estimate[2] / param_estimate[1]
+        return np.array([most_likely, np.nan, np.nan])
+
+
 def confidence_intervals(param_estimate: np.array, vals: np.array) -> tuple:
     """
     Estimate the confidence intervals for the burst frequency (lambda) and burst size (nu / mu).
@@ -175,11 +198,5 @@ def confidence_intervals(param_estimate: np.array, vals: np.array) -> tuple:
 
     Returns np.array([most_likely, conf_low, conf_high]) for both burst frequency and burst size.
     """
-    try:
-        confidence_freq, *_ = bounds_params(param_estimate, vals, 'burst_freq')
-        confidence_size, *_ = bounds_params(param_estimate, vals, 'burst_size')
-
-        return confidence_freq, confidence_size
-    except Exception as e:
-        return np.array([param_estimate[0], np.nan, np.nan]),\
-               np.array([param_estimate[1], np.nan, np.nan])
+    return confidence_interval(param_estimate, vals, 'burst_freq'), \
+        confidence_interval(param_estimate, vals, 'burst_size')
@@ -1,8 +1,7 @@
 """
 Gene product class for the markovian IAP0 model.
 """
-import random
-
+import numpy as np
 import simpy
 
 from .product import Product
@@ -22,7 +21,9 @@ class Gene:
             mu: float,
             nu: float,
             delta: float,
-            active: bool = False
+            active: bool = False,
+            keep_products: bool = True,
+            rng: np.random.Generator = None
     ):
         """
         Initialization of the gene.
@@ -33,6 +34,11 @@ class Gene:
         :param nu:     nu (product synthesis rate)
         :param delta:  delta (product degradation rate)
         :param active: whether or not the gene is active
+        :param keep_products: whether or not to keep every product in self.products. When False,
+                              only the number of (non-degraded) products is tracked, so memory
+                              does not grow with the simulated time.
+        :param rng:    random number generator, shared with the products (default: a freshly
+                       seeded generator)
         """
         # store the args in self
         self.env = env
@@ -41,6 +47,11 @@ class Gene:
         self.nu = nu        # nu
         self.delta = delta  # delta
         self.active = active
+        self.keep_products = keep_products
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        # functions that get called with (gene, event) on every event, see Gene.notify
+        self.observers = []
 
         # Start the run process every time a Gene is created.
         self.running = env.process(self.run())
@@ -51,6 +62,7 @@ class Gene:
         # setup variables
         self.time_on = 0
         self.products = []
+        self.nr_products = 0
         self.switches = 0
 
     def run(self):
@@ -68,15 +80,16 @@ class Gene:
 
             # stay in the on/off state for a certain amount of time
             if self.active:
-                time = random.expovariate(self.mu)
+                time = self.rng.exponential(1 / self.mu)
                 yield self.env.timeout(time)
                 self.time_on += time
             else:
-                yield self.env.timeout(random.expovariate(self.lambd))
+                yield self.env.timeout(self.rng.exponential(1 / self.lambd))
 
             # now update our state, and keep track of the total amount of switches
             self.switches += 1
             self.active ^= True
+            self.notify('activation' if self.active else 'inactivation')
 
     def transcribe(self):
         """
@@ -84,12 +97,31 @@ class Gene:
         """
         while True:
             try:
-                time = random.expovariate(self.nu)
+                time = self.rng.exponential(1 / self.nu)
                 yield self.env.timeout(time)
-                self.products.append(Product(self.env, self.delta))
+                product = Product(self.env, self.delta, self.degraded, self.rng)
+                if self.keep_products:
+                    self.products.append(product)
+                self.nr_products += 1
+                self.notify('synthesis')
             except simpy.Interrupt:
                 break
 
+    def degraded(self, _product: Product):
+        """
+        Keep track of the number of products when one of our products degrades.
+        """
+        self.nr_products -= 1
+        self.notify('degradation')
+
+    def notify(self, event: str):
+        """
+        Call all observers with the gene and the event ('activation', 'inactivation', 'synthesis',
+        or 'degradation') that just happened.
+        """
+        for observer in self.observers:
+            observer(self, event)
+
     @property
     def time_off(self):
         """
@@ -6,6 +6,7 @@ from typing import Tuple
 from functools import lru_cache, wraps
 import numpy as np
 import scipy.optimize
+import scipy.sparse
 import scipy.stats
 import scipy.special
 
@@ -47,6 +48,70 @@ def moment_based(vals: np.array) -> np.array:
     return np.array([la_est, mu_est, nu_est])
 
 
+def factorial_moments(vals) -> np.ndarray:
+    """
+    Calculate the first three factorial moments of every row (gene) of a dense or sparse matrix.
+
+    Missing values (nan) are ignored. Rows without any values get nan moments.
+    """
+    if scipy.sparse.issparse(vals):
+        vals = scipy.sparse.csr_matrix(vals, dtype=float)
+        missing = np.isnan(vals.data)
+        data = np.where(missing, 0, vals.data)
+
+        def row_sum(values):
+            matrix = scipy.sparse.csr_matrix((values, vals.indices, vals.indptr), shape=vals.shape)
+            return np.asarray(matrix.sum(axis=1)).ravel()
+
+        # zeros don't contribute to any of the moments, so only the stored values matter
+        nr_vals = vals.shape[1] - row_sum(missing.astype(float))
+        sums = [row_sum(data), row_sum(data * (data - 1)), row_sum(data * (data - 1) * (data - 2))]
+    else:
+        vals = np.asarray(vals, dtype=float)
+        assert len(vals.shape) == 2, "vals should be a 2D array"
+        nr_vals = np.sum(~np.isnan(vals), axis=1)
+        sums = [np.nansum(vals, axis=1), np.nansum(vals * (vals - 1), axis=1),
+                np.nansum(vals * (vals - 1) * (vals - 2), axis=1)]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moments = np.stack(sums, axis=1) / nr_vals[:, np.newaxis]
+    moments[nr_vals == 0] = np.nan
+
+    return moments
+
+
+def moment_based_matrix(vals, moments: np.ndarray = None) -> np.ndarray:
+    """
+    Estimate parameters lambda, mu, and nu for every row (gene) of a dense or sparse matrix at once.
+
+    Vectorized version of moment_based, that ignores missing values (nan). Degenerate genes, for
+    which moment_based would attempt a division by zero, get nan estimates. When the factorial
+    moments of vals are already calculated, they can be passed as moments.
+    """
+    m_1, m_2, m_3 = (factorial_moments(vals) if moments is None else moments).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_1 = m_1
+        r_2 = m_2 / m_1
+        r_3 = m_3 / m_2
+
+        la_denom = (r_1 * r_2 - 2 * r_1 * r_3 + r_2 * r_3)
+        nu_denom = (r_1 - 2 * r_2 + r_3)
+
+        la_est = (2 * r_1 * (r_3 - r_2)) / la_denom
+        mu_est = (2 * (r_3 - r_2) * (r_1 - r_3) * (r_2 - r_1)) / (la_denom * nu_denom)
+        nu_est = (2 * r_1 * r_3 - r_1 * r_2 - r_2 * r_3) / nu_denom
+
+    params = np.stack([la_est, mu_est, nu_est], axis=1)
+
+    # mask the genes for which a moment or denominator is zero
+    degenerate = (m_1 == 0) | (m_2 == 0) | (la_denom == 0) | (nu_denom == 0) | \
+        ~np.isfinite(params).all(axis=1)
+    params[degenerate] = np.nan
+
+    return params
+
+
 def get_bounds_params3(vals: np.array) -> Tuple[tuple, np.array]:
     """
     Estimate the initial parameters of the BP3 model, and its bounds.
@@ -70,6 +135,25 @@ def get_bounds_params3(vals: np.array) -> Tuple[tuple, np.array]:
     return bounds, params
 
 
+def get_bounds_params3_matrix(vals, estimates: np.ndarray = None) -> Tuple[tuple, np.ndarray]:
+    """
+    Estimate the initial parameters of the BP3 model for every row (gene) of a matrix at once.
+
+    Vectorized version of get_bounds_params3, which can be used as the table of initial parameters
+    for maximum_likelihood. When the moment_based_matrix estimates of vals are already calculated,
+    they can be passed as estimates.
+    """
+    bounds = ((1e-6, 1e6), (1e-6, 1e6), (1e-6, 1e6))
+
+    params = moment_based_matrix(vals) if estimates is None else np.array(estimates, dtype=float)
+    params[np.isnan(params).any(axis=1) | (params < 0).any(axis=1)] = 10
+
+    # force estimated params between bounds
+    params = np.clip(params, *np.array(bounds).T)
+
+    return bounds, params
+
+
 def get_bounds_params4() -> Tuple[tuple, np.array]:
     """
     Estimate the initial parameters of the BP4 model, and its bounds.
@@ -84,18 +168,55 @@ def get_bounds_params4() -> Tuple[tuple, np.array]:
     return bounds, params
 
 
+def compact_histogram(vals: np.array) -> Tuple[np.array, np.array]:
+    """
+    Return the unique values and their counts in the smallest dtypes that hold them.
+
+    Non-negative integer values (e.g. UMI counts) are stored as unsigned integers, so a gene with
+    counts below 256 takes a single byte per unique value. Other values keep their dtype.
+    """
+    uniques, counts = np.unique(vals, return_counts=True)
+    if uniques.size and np.all(np.isfinite(uniques)) and np.all(uniques >= 0) and \
+            np.all(uniques == np.round(uniques)):
+        uniques = uniques.astype(np.min_scalar_type(int(uniques.max())))
+    if counts.size:
+        counts = counts.astype(np.min_scalar_type(int(counts.max())))
+
+    return uniques, counts
+
+
+def to_hashable(arg):
+    """
+    Turn np arrays into (nested) tuples, so they can be part of the key of a cache.
+    """
+    if isinstance(arg, np.ndarray):
+        return tuple(map(to_hashable, arg)) if arg.ndim else arg.item()
+    return arg
+
+
 def np_cache(function):
     """
     Small decorator that caches np arrays.
+
+    The key of an array is its compact histogram (see compact_histogram), which keeps the cache
+    small for genes measured in many cells. Other arguments are passed on, and are part of the key
+    of the cache; np arrays are passed on as tuples, other arguments should be hashable.
     """
     @lru_cache(maxsize=25000)
-    def cached_wrapper(hashable_array):
-        array = np.fromstring(hashable_array, dtype=int)
-        return function(array)
+    def cached_wrapper(uniques, counts, dtypes, *args, **kwargs):
+        uniques_dtype, counts_dtype, dtype = dtypes
+        array = np.repeat(np.frombuffer(uniques, dtype=uniques_dtype),
+                          np.frombuffer(counts, dtype=counts_dtype)).astype(dtype)
+        return function(array, *args, **kwargs)
 
     @wraps(function)
-    def wrapper(array):
-        return cached_wrapper(np.sort(array).tostring())
+    def wrapper(array, *args, **kwargs):
+        array = np.asarray(array)
+        uniques, counts = compact_histogram(array)
+        return cached_wrapper(uniques.tobytes(), counts.tobytes(),
+                              (uniques.dtype.str, counts.dtype.str, array.dtype.str),
+                              *map(to_hashable, args),
+                              **{key: to_hashable(value) for key, value in kwargs.items()})
 
     # copy lru_cache attributes over too
     wrapper.cache_info = cached_wrapper.cache_info
@@ -105,11 +226,15 @@ def np_cache(function):
 
 
 @np_cache
-def maximum_likelihood(_vals: np.array, model: str = 'BP3') -> np.array:
+def maximum_likelihood(_vals: np.array, model: str = 'BP3', initial: tuple = None,
+                       maxiter: int = None) -> np.array:
     """
     Get the most likely parameters of either the BP3 or the BP4 model.
 
-    Parameters are estimated by scipy optimization.
+    Parameters are estimated by scipy optimization. The optimization starts from initial when it is
+    given (e.g. a row of get_bounds_params3_matrix), otherwise from the model's default estimate.
+    When maxiter is given the optimization is cut off after maxiter iterations, and the (possibly
+    not converged) estimate at that point is returned; a cheap fit for hard genes.
     """
     # remove the missing value data
     vals = _vals[~np.isnan(_vals)]
@@ -127,18 +252,22 @@ def maximum_likelihood(_vals: np.array, model: str = 'BP3') -> np.array:
     else:
         raise NotImplementedError
 
+    if initial is not None:
+        params = np.array(initial, dtype=float)
+
     # convert our values to the unique values and their counts
-    uniques, counts = np.unique(vals, return_counts=True)
+    uniques, counts = compact_histogram(vals)
 
     # let scipy do the complicated param estimation
     res = scipy.optimize.minimize(beta_poisson_log_likelihood,
                                   params,
                                   args=(uniques, counts),
                                   method='L-BFGS-B',
-                                  bounds=bounds)
+                                  bounds=bounds,
+                                  options={} if maxiter is None else {'maxiter': maxiter})
 
     # if not successful return nan, else the result
-    if not res.success:
+    if not res.success and not (maxiter is not None and res.nit >= maxiter):
         return np.array([np.nan, np.nan, np.nan])
 
     # FIXME: BP4
@@ -152,14 +281,31 @@ def likelihood_ratio_test(_vals_1: np.array, _vals_2: np.array):
     likelihood ratio test.
     """
     vals_1, vals_2 = np.copy(_vals_1), np.copy(_vals_2)
-    vals_2_uniques, vals_2_counts = np.unique(vals_2, return_counts=True)
 
     # calculate the most likely parameters (theta hat)
     theta_hat_1 = maximum_likelihood(vals_1)
     theta_hat_2 = maximum_likelihood(vals_2)
 
+    return theta_hat_1, theta_hat_2, constrained_likelihood_ratio_test(theta_hat_1, theta_hat_2,
+                                                                       vals_2)
+
+
+def constrained_likelihood_ratio_test(theta_hat_1: np.array, theta_hat_2: np.array,
+                                      _vals_2: np.array) -> np.array:
+    """
+    Test per parameter whether the already fitted parameters of two conditions are different
+    through the likelihood ratio test.
+
+    Each parameter of the second condition is fixed to the value of the first condition in turn,
+    and the other parameters are refitted on the values of the second condition. Missing values
+    (nan) are ignored, like in maximum_likelihood.
+    """
     if np.isnan(theta_hat_1).any() or np.isnan(theta_hat_2).any():
-        return theta_hat_1, theta_hat_2, np.array([np.nan, np.nan, np.nan])
+        return np.array([np.nan, np.nan, np.nan])
+
+    # remove the missing value data
+    vals_2 = _vals_2[~np.isnan(_vals_2)]
+    vals_2_uniques, vals_2_counts = np.unique(vals_2, return_counts=True)
 
     # store the likelihood of the second model
     zero_hypothesis = beta_poisson_log_likelihood(theta_hat_2, vals_2_uniques, vals_2_counts)
@@ -189,4 +335,4 @@ def likelihood_ratio_test(_vals_1: np.array, _vals_2: np.array):
         probability = 1 - scipy.stats.chi2.cdf(2*(theta_zero - zero_hypothesis), 1)
         probabilities[i] = probability
 
-    return theta_hat_1, theta_hat_2, probabilities
+    return probabilities
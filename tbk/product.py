@@ -1,7 +1,7 @@
 """
 Gene product class for the markovian IAP0 model.
 """
-import random
+import numpy as np
 import simpy
 
 
@@ -13,15 +13,20 @@ class Product:
     divided by delta, so that all times are relative to the half-time of the product).
     """
 
-    def __init__(self, env: simpy.core.Environment, delta: float):
+    def __init__(self, env: simpy.core.Environment, delta: float, on_degraded=None,
+                 rng: np.random.Generator = None):
         """
         Initialization of the product.
 
-        :param env: simpy environment class
-        :param de:  delta (the rate of product degradation)
+        :param env:         simpy environment class
+        :param de:          delta (the rate of product degradation)
+        :param on_degraded: optional function that is called with the product once it degraded
+        :param rng:         random number generator (default: a freshly seeded generator)
         """
         self.env = env
         self.delta = delta
+        self.on_degraded = on_degraded
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.start = self.env.now
         self.end = None
         self.process = env.process(self.degradation())
@@ -30,9 +35,11 @@ class Product:
         """
         Degrade after 1/delta time on average.
         """
-        time = random.expovariate(self.delta)
+        time = self.rng.exponential(1 / self.delta)
         yield self.env.timeout(time)
         self.end = self.env.now
+        if self.on_degraded is not None:
+            self.on_degraded(self)
 
     @property
     def age(self):
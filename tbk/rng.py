@@ -0,0 +1,43 @@
+"""
+Reproducible and independent random streams, also when running in parallel.
+"""
+from typing import List, Union
+
+import numpy as np
+
+# anything np.random.default_rng and np.random.SeedSequence accept as seed
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+def seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """
+    Return seed as a SeedSequence. Without a seed, the sequence gets fresh entropy from the OS.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def seed_key(seed: np.random.SeedSequence) -> str:
+    """
+    Return a string that identifies the stream of the seed (its entropy and spawn key), e.g. to
+    store with results that were generated from it.
+    """
+    return '/'.join(map(str, [seed.entropy, *seed.spawn_key]))
+
+
+def spawn(seed: Seed, n: int) -> List[np.random.SeedSequence]:
+    """
+    Spawn n independent child seeds, e.g. one per cell or per worker task.
+    """
+    return seed_sequence(seed).spawn(n)
+
+
+def keyed(seed: Seed, *key: float) -> np.random.SeedSequence:
+    """
+    Return a child seed that depends on the key (e.g. the parameters of a point of a sweep) instead
+    of on the order in which children are spawned, so the same key always gets the same stream.
+    """
+    seed = seed_sequence(seed)
+    words = np.array(key, dtype=float).view(np.uint32)
+    return np.random.SeedSequence(seed.entropy, spawn_key=(*seed.spawn_key, *map(int, words)))
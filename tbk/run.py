@@ -1,30 +1,105 @@
 """
 Function that runs an environment with a gene collecting products.
 """
-from typing import Tuple
+from collections import namedtuple
+from typing import Iterator, Tuple
 
+import numpy as np
 import simpy
 
 from .gene import Gene
+from .rng import Seed
+from .trace import Tracer
 
+# the state of a gene at a certain time
+Snapshot = namedtuple('Snapshot', ['time', 'active', 'products'])
 
-def run_env(lambd: float, mu: float, nu: float, delta=1, time=5000)\
-        -> Tuple[simpy.Environment, Gene]:
+
+def run_env(lambd: float, mu: float, nu: float, delta=1, time=5000, keep_products=True,
+            tracer: Tracer = None, seed: Seed = None) -> Tuple[simpy.Environment, Gene]:
     """
     Run an environment with one gene for a certain amount of time.
+
+    When a tracer is passed, the run is traced (see tbk.trace). Runs with the same seed (an int or
+    np.random.SeedSequence, see tbk.rng) are identical, without a seed each run is independent.
     """
     env = simpy.Environment()
+    if tracer is not None:
+        tracer.attach(env)
 
-    gene = Gene(env, lambd, mu, nu, delta)
+    gene = Gene(env, lambd, mu, nu, delta, keep_products=keep_products,
+                rng=np.random.default_rng(seed))
+    if tracer is not None:
+        tracer.watch(gene)
 
     env.run(until=time)
 
     return env, gene
 
 
-def get_products(lambd: float, mu: float, nu: float, delta=1, time=5000) -> int:
+def get_products(lambd: float, mu: float, nu: float, delta=1, time=5000, seed: Seed = None) -> int:
     """
     Return the number of products from a run.
     """
-    _, gene = run_env(lambd, mu, nu, delta, time)
-    return len([product for product in gene.products if not product.degraded])
+    _, gene = run_env(lambd, mu, nu, delta, time, keep_products=False, seed=seed)
+    return gene.nr_products
+
+
+def stream(gene: Gene, time: float, interval: float = None) -> Iterator[Snapshot]:
+    """
+    Run the environment of the gene until time, and yield snapshots of the gene along the way.
+
+    When interval is given a snapshot is taken every interval (starting at the current time of the
+    environment), otherwise a snapshot is taken after every event of the gene (activation,
+    inactivation, synthesis, and degradation). Only the current snapshot is kept in memory, so
+    together with a gene that doesn't keep its products, long runs take constant memory. Once all
+    snapshots are consumed the environment is at time, so switch statistics (e.g. gene.switches and
+    gene.time_on) can be read from the gene afterwards.
+    """
+    env = gene.env
+
+    if interval is not None:
+        start = env.now
+        for i in range(int(np.floor((time - start) / interval)) + 1):
+            if start + i * interval > env.now:
+                env.run(until=start + i * interval)
+            yield Snapshot(env.now, gene.active, gene.nr_products)
+        if env.now < time:
+            env.run(until=time)
+        return
+
+    # collect the snapshots of the events that happen during a single step of the environment
+    snapshots = []
+
+    def observer(_gene, _event):
+        snapshots.append(Snapshot(env.now, _gene.active, _gene.nr_products))
+
+    gene.observers.append(observer)
+    try:
+        while env.peek() < time:
+            env.step()
+            yield from snapshots
+            snapshots.clear()
+        # there are no events left before time, but the clock still has to advance to it
+        if env.now < time:
+            env.run(until=time)
+    finally:
+        gene.observers.remove(observer)
+
+
+def run_snapshots(lambd: float, mu: float, nu: float, delta=1, time=5000, interval=1,
+                  seed: Seed = None) -> Tuple[np.ndarray, Gene]:
+    """
+    Run an environment with one gene, and take a snapshot every interval.
+
+    Returns a preallocated array with a (time, active, products) row per snapshot, and the gene.
+    Products are not kept, so memory only depends on the number of snapshots.
+    """
+    env = simpy.Environment()
+    gene = Gene(env, lambd, mu, nu, delta, keep_products=False, rng=np.random.default_rng(seed))
+
+    snapshots = np.zeros((int(np.floor(time / interval)) + 1, 3))
+    for i, snapshot in enumerate(stream(gene, time, interval)):
+        snapshots[i] = snapshot
+
+    return snapshots, gene
@@ -0,0 +1,122 @@
+"""
+Spread tasks of very different size (e.g. per-gene fits) evenly over a pool of workers.
+"""
+import multiprocessing as mp
+import os
+import time
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse
+
+from .inference import factorial_moments
+
+
+def _nr_uniques(vals) -> np.ndarray:
+    """
+    Count the number of unique (non-missing) values of every row (gene) of a dense or sparse matrix.
+    """
+    if scipy.sparse.issparse(vals):
+        vals = scipy.sparse.csr_matrix(vals, dtype=float)
+        nr_uniques = np.zeros(vals.shape[0], dtype=int)
+        for i in range(vals.shape[0]):
+            data = vals.data[vals.indptr[i]:vals.indptr[i + 1]]
+            data = data[~np.isnan(data)]
+            # the zeros that are not stored are a unique value as well
+            has_zero = vals.indptr[i + 1] - vals.indptr[i] < vals.shape[1] or np.any(data == 0)
+            nr_uniques[i] = len(np.unique(data[data != 0])) + has_zero
+        return nr_uniques
+
+    vals = np.sort(np.asarray(vals, dtype=float), axis=1)
+    # nan values are sorted to the end, so only count changes between non-missing values
+    changes = (np.diff(vals, axis=1) != 0) & ~np.isnan(vals[:, 1:])
+    return np.sum(changes, axis=1) + np.any(~np.isnan(vals), axis=1)
+
+
+def fit_cost(vals, moments: np.ndarray = None) -> np.ndarray:
+    """
+    Estimate the relative cost of fitting every row (gene) of a dense or sparse matrix.
+
+    Every evaluation of the likelihood calculates a poisson pmf matrix with a column per unique
+    value, and highly expressed genes take more iterations to converge, so the cost is estimated as
+    the number of unique values times the log of the mean expression. When the factorial moments of
+    vals are already calculated (e.g. by tbk.triage), they can be passed as moments.
+    """
+    mean = (factorial_moments(vals) if moments is None else moments)[:, 0]
+    return _nr_uniques(vals) * (1 + np.log1p(np.nan_to_num(mean)))
+
+
+def simulation_cost(lambd: float, mu: float, nu: float, ncells: int = 1, time: float = 5000) \
+        -> float:
+    """
+    Estimate the relative cost of simulating ncells cells, as the expected number of events.
+
+    In steady state a gene switches 2 * lambd * mu / (lambd + mu) times per time unit, and makes
+    (and degrades) nu * lambd / (lambd + mu) products per time unit. The degradation rate only
+    changes how many products are alive at the same time, not how many are made.
+    """
+    return ncells * time * (2 * lambd * mu + 2 * nu * lambd) / (lambd + mu)
+
+
+def chunk(costs: Sequence[float], nworkers: int, chunks_per_worker: int = 4) -> List[List[int]]:
+    """
+    Order tasks longest-first, and group them into chunks of roughly equal cost.
+
+    Expensive tasks get a chunk of their own, while cheap tasks are grouped so the overhead per
+    chunk stays small. Returns the chunks as lists of task indices.
+    """
+    costs = np.asarray(costs, dtype=float)
+    target = np.sum(costs) / max(1, nworkers * chunks_per_worker)
+
+    chunks, current, current_cost = [], [], 0
+    for index in np.argsort(-costs, kind='stable'):
+        current.append(int(index))
+        current_cost += costs[index]
+        if current_cost >= target:
+            chunks.append(current)
+            current, current_cost = [], 0
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def _run_chunk(args: tuple) -> tuple:
+    """
+    Run a chunk of tasks, and keep track of which worker ran it and for how long.
+    """
+    func, tasks = args
+    start = time.time()
+    results = [(index, func(*task)) for index, task in tasks]
+    return os.getpid(), start, time.time(), results
+
+
+def balanced_starmap(func: Callable, tasks: Sequence[tuple], costs: Sequence[float],
+                     nworkers: int = 1, chunks_per_worker: int = 4) -> Tuple[list, dict]:
+    """
+    Like Pool.starmap, but tasks are handed out longest-first in chunks of roughly equal cost.
+
+    Returns the results (in the order of tasks), and a report with the wall time, and per worker
+    the time it was busy, the number of tasks and chunks it ran, and its utilization.
+    """
+    chunks = chunk(costs, nworkers, chunks_per_worker)
+
+    results = [None] * len(tasks)
+    workers = {}
+    start = time.time()
+    with mp.Pool(processes=nworkers) as pool:
+        for pid, chunk_start, chunk_end, chunk_results in pool.imap_unordered(
+                _run_chunk, [(func, [(index, tasks[index]) for index in indices])
+                             for indices in chunks]):
+            worker = workers.setdefault(pid, {'busy': 0.0, 'tasks': 0, 'chunks': 0})
+            worker['busy'] += chunk_end - chunk_start
+            worker['tasks'] += len(chunk_results)
+            worker['chunks'] += 1
+            for index, result in chunk_results:
+                results[index] = result
+    wall = time.time() - start
+
+    for worker in workers.values():
+        worker['utilization'] = worker['busy'] / wall if wall > 0 else 0.0
+
+    return results, {'wall': wall, 'workers': workers}
@@ -0,0 +1,130 @@
+"""
+Asyncio interface to the inference, for interactive use (e.g. dashboards).
+"""
+import asyncio
+import concurrent.futures
+from typing import AsyncIterator, Tuple
+
+import numpy as np
+
+from .confidence_interval import confidence_interval
+from .inference import maximum_likelihood, to_hashable
+
+
+class InferenceService:
+    """
+    Run fits in executors, so the event loop stays responsive while scipy is optimizing.
+
+    Identical requests that are in flight at the same time share a single fit. Point estimates run
+    in their own executor, so they don't have to queue behind the (much slower) confidence
+    intervals in the background executor.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = None,
+            executor: concurrent.futures.Executor = None,
+            background_executor: concurrent.futures.Executor = None
+    ):
+        """
+        Initialization of the service.
+
+        :param max_workers:         the number of workers of the executors we create ourselves
+        :param executor:            executor for the point estimates (default: a process pool)
+        :param background_executor: executor for the confidence intervals (default: a process pool)
+        """
+        self.executor = executor or \
+            concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        self.background_executor = background_executor or \
+            concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+        # key: [future, number of callers waiting for it]
+        self.in_flight = {}
+
+    async def _submit(self, executor: concurrent.futures.Executor, func, *args):
+        """
+        Run func(*args) in the executor, or wait for the identical request that is already in
+        flight.
+
+        When every caller waiting for a request is cancelled, the request itself is cancelled too.
+        Note that a request that already started running in the executor can't be stopped, only its
+        result is ignored.
+        """
+        key = (func.__name__, *map(to_hashable, args))
+        if key not in self.in_flight:
+            future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            self.in_flight[key] = entry = [future, 0]
+            future.add_done_callback(
+                lambda _: self.in_flight.pop(key) if self.in_flight.get(key) is entry else None)
+        entry = self.in_flight[key]
+
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            if entry[1] == 1:
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    async def maximum_likelihood(self, vals: np.array) -> np.array:
+        """
+        Get the most likely parameters of the BP3 model, see tbk.inference.maximum_likelihood.
+        """
+        return await self._submit(self.executor, maximum_likelihood, np.sort(vals))
+
+    async def confidence_interval(self, param_estimate: np.array, vals: np.array,
+                                  param_name: str) -> np.array:
+        """
+        Estimate the confidence interval of the burst frequency or burst size, see
+        tbk.confidence_interval.confidence_interval.
+        """
+        return await self._submit(self.background_executor, confidence_interval,
+                                  np.asarray(param_estimate), np.sort(vals), param_name)
+
+    async def confidence_intervals(self, param_estimate: np.array, vals: np.array) -> tuple:
+        """
+        Estimate the confidence intervals of both the burst frequency and burst size concurrently.
+        """
+        return tuple(await asyncio.gather(
+            self.confidence_interval(param_estimate, vals, 'burst_freq'),
+            self.confidence_interval(param_estimate, vals, 'burst_size')))
+
+    async def stream(self, vals: np.array) -> AsyncIterator[Tuple[str, np.array]]:
+        """
+        Yield the results for vals as soon as they are ready.
+
+        First ('params', point estimate) is yielded, followed by ('burst_freq', interval) and
+        ('burst_size', interval) in the order in which they finish. When the point estimate failed
+        no intervals are estimated. When the consumer stops iterating, the intervals are cancelled.
+        """
+        params = await self.maximum_likelihood(vals)
+        yield 'params', params
+
+        if np.isnan(params).any():
+            return
+
+        pending = {asyncio.ensure_future(self.confidence_interval(params, vals, name)): name
+                   for name in ['burst_freq', 'burst_size']}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self, wait: bool = True):
+        """
+        Shut down the executors.
+        """
+        self.executor.shutdown(wait=wait)
+        self.background_executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.close(wait=False)
@@ -0,0 +1,142 @@
+"""
+Parameter sweep to validate the inference on simulated data of the markovian model.
+"""
+import itertools
+import multiprocessing as mp
+import os
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .confidence_interval import confidence_intervals
+from .inference import maximum_likelihood
+from .rng import Seed, keyed, seed_key, seed_sequence, spawn
+from .run import get_products
+from .schedule import simulation_cost
+
+# the columns that identify a finished point of the sweep
+KEYS = ['lambd', 'mu', 'nu', 'delta', 'ncells', 'nreplicates', 'time', 'coverage']
+PARAMS = ['k_on', 'k_off', 'k_syn']
+
+
+def parameter_grid(lambds: Iterable[float], mus: Iterable[float], nus: Iterable[float],
+                   deltas: Iterable[float] = (1,)) -> List[Tuple[float, float, float, float]]:
+    """
+    Return all combinations of lambda, mu, nu, and delta.
+    """
+    return [tuple(float(param) for param in point)
+            for point in itertools.product(lambds, mus, nus, deltas)]
+
+
+def simulate_cells(lambd: float, mu: float, nu: float, delta: float = 1, ncells: int = 100,
+                   time: float = 100, seed: Seed = None) -> np.array:
+    """
+    Simulate ncells independent cells, and return the number of products in each cell.
+
+    The simulated time should be long compared to 1 / delta and 1 / (lambd + mu), so that each cell
+    reaches its steady state. Every cell gets its own child seed of seed (see tbk.rng).
+    """
+    return np.array([get_products(lambd, mu, nu, delta, time, cell_seed)
+                     for cell_seed in spawn(seed, ncells)])
+
+
+def sweep_point(lambd: float, mu: float, nu: float, delta: float = 1, ncells: int = 100,
+                nreplicates: int = 10, time: float = 100, coverage: bool = True,
+                seed: Seed = None) -> dict:
+    """
+    Simulate and fit nreplicates datasets of ncells cells for a single point of the grid.
+
+    The beta poisson parameters are relative to the degradation rate, so the true parameters are
+    lambda, mu, and nu divided by delta. Returns the bias and variance of the estimates, the number
+    of failed fits, and (optionally) how often the confidence intervals of the burst frequency and
+    burst size contain their true value. Every replicate gets its own child seed of seed.
+    """
+    truth = np.array([lambd, mu, nu]) / delta
+    true_freq, true_size = truth[0], truth[2] / truth[1]
+
+    estimates = np.full((nreplicates, 3), np.nan)
+    covered_freq, covered_size = [], []
+    for replicate, replicate_seed in enumerate(spawn(seed, nreplicates)):
+        vals = simulate_cells(lambd, mu, nu, delta, ncells, time, replicate_seed)
+        estimates[replicate] = maximum_likelihood(vals)
+
+        if not coverage or np.isnan(estimates[replicate]).any():
+            continue
+
+        conf_freq, conf_size = confidence_intervals(estimates[replicate], vals)
+        if not np.isnan(conf_freq).any():
+            covered_freq.append(conf_freq[1] <= true_freq <= conf_freq[2])
+        if not np.isnan(conf_size).any():
+            covered_size.append(conf_size[1] <= true_size <= conf_size[2])
+
+    row = dict(zip(KEYS, [lambd, mu, nu, delta, ncells, nreplicates, time, coverage]))
+    failed = np.isnan(estimates).any(axis=1)
+    row['failed'] = int(failed.sum())
+    for i, param in enumerate(PARAMS):
+        row[f'bias {param}'] = np.mean(estimates[~failed, i]) - truth[i] if not failed.all() \
+            else np.nan
+        row[f'var {param}'] = np.var(estimates[~failed, i]) if not failed.all() else np.nan
+    row['coverage burst_freq'] = np.mean(covered_freq) if covered_freq else np.nan
+    row['coverage burst_size'] = np.mean(covered_size) if covered_size else np.nan
+
+    return row
+
+
+def _sweep_point(args: tuple) -> dict:
+    """
+    Unpack the arguments for sweep_point, so it can be used with Pool.imap_unordered.
+    """
+    return sweep_point(*args)
+
+
+def parameter_sweep(grid: Iterable[tuple], ncells: int = 100, nreplicates: int = 10,
+                    time: float = 100, coverage: bool = True, nworkers: int = 1,
+                    cache: str = None, seed: Seed = None) -> pd.DataFrame:
+    """
+    Run sweep_point for every (lambd, mu, nu, delta) point of the grid over a pool of workers.
+
+    The seed of each point is derived from seed and the point itself (see tbk.rng.keyed), so with
+    a seed the results are reproducible, independent of the number of workers and of the grid.
+
+    When cache is the path to a csv file, points that were finished before (with the same ncells,
+    nreplicates, time, coverage, and seed) are read from it instead of simulated again, and every
+    newly finished point is appended to it. This way a grid can be extended without redoing earlier
+    work. Without a seed every sweep gets fresh entropy, so then nothing is reused.
+    """
+    # without a seed, still derive all points from a single (fresh) sequence
+    seed = seed_sequence(seed)
+
+    # only reuse points that were finished with the same seed
+    done = pd.DataFrame(columns=[*KEYS, 'seed'])
+    if cache is not None and os.path.exists(cache):
+        done = pd.read_csv(cache, dtype={'seed': str})
+        done = done[done['seed'] == seed_key(seed)]
+
+    finished = set(map(tuple, done[KEYS].astype(float).values.tolist()))
+    points = [(*point, ncells, nreplicates, time, coverage) for point in grid]
+    todo = [point for point in points if tuple(map(float, point)) not in finished]
+
+    # hand out the most expensive points first, so no worker is left with a big point at the end
+    todo.sort(key=lambda point: -simulation_cost(*point[:3], point[4] * point[5], point[6]))
+
+    # coverage doesn't change the simulated cells, so it is not part of the seed
+    tasks = [(*point, keyed(seed, *point[:-1])) for point in todo]
+
+    rows = []
+    with mp.Pool(processes=nworkers) as pool:
+        for row in pool.imap_unordered(_sweep_point, tasks):
+            row['seed'] = seed_key(seed)
+            rows.append(row)
+            if cache is not None:
+                pd.DataFrame([row]).to_csv(cache, mode='a', index=False,
+                                           header=not os.path.exists(cache))
+
+    # combine the earlier and new results, in the order of the grid
+    results = pd.concat([frame for frame in [done, pd.DataFrame(rows)] if len(frame)] or [done],
+                        ignore_index=True)
+    results[KEYS] = results[KEYS].astype(float)
+    results = results.set_index(KEYS).loc[[tuple(map(float, point)) for point in points]]
+    results = results.reset_index().astype({'ncells': int, 'nreplicates': int, 'coverage': bool})
+
+    return results
@@ -0,0 +1,133 @@
+"""
+Opt-in tracing of the simulation, to see where the time of a run goes.
+"""
+import json
+import time as timer
+from collections import Counter, defaultdict
+
+import simpy
+
+
+class Tracer:
+    """
+    Tracer of a simpy environment.
+
+    Every step of the environment is counted per event type (e.g. Timeout, Initialize, and
+    Interruption for every simpy.Interrupt that is thrown), and its wall time is attributed to the
+    kind of process it resumes (e.g. Gene.run, Gene.transcribe, or Product.degradation), which
+    includes the time spent drawing random numbers and creating products in that process. The size
+    of the event queue and the number of products are sampled over simulated time.
+    """
+
+    def __init__(self, sample_interval: float = 1.0):
+        """
+        Initialization of the tracer.
+
+        :param sample_interval: (simulated) time between samples of the queue and product sizes
+        """
+        self.sample_interval = sample_interval
+
+        self.events = Counter()               # event type: number of events
+        self.steps = Counter()                # (process kind, event type): number of steps
+        self.wall_time = defaultdict(float)   # (process kind, event type): seconds
+        self.samples = []                     # (time, queue size, alive products, kept products)
+
+        self.env = None
+        self.gene = None
+        self._next_sample = 0
+
+    def attach(self, env: simpy.Environment):
+        """
+        Start tracing the environment, by wrapping its step method.
+        """
+        self.env = env
+        step = env.step
+
+        def traced_step():
+            # simpy has no public way to peek at the next event, nor at the size of its queue
+            event = env._queue[0][3] if env._queue else None
+            if isinstance(event, simpy.events.Interruption):
+                processes = [event.process]
+            else:
+                callbacks = getattr(event, 'callbacks', None) or []
+                processes = [callback.__self__ for callback in callbacks
+                             if isinstance(getattr(callback, '__self__', None), simpy.Process)]
+            kinds = [process._generator.__qualname__ for process in processes] or ['simpy']
+
+            start = timer.perf_counter()
+            try:
+                step()
+            finally:
+                elapsed = timer.perf_counter() - start
+                event_type = type(event).__name__
+                self.events[event_type] += 1
+                for kind in kinds:
+                    self.steps[(kind, event_type)] += 1
+                    self.wall_time[(kind, event_type)] += elapsed / len(kinds)
+
+                if env.now >= self._next_sample:
+                    self.sample()
+
+        env.step = traced_step
+
+    def watch(self, gene):
+        """
+        Also sample the number of products of the gene.
+        """
+        self.gene = gene
+
+    def sample(self):
+        """
+        Store the size of the event queue and the number of products at the current time.
+
+        Samples are taken at the first step after each multiple of sample_interval.
+        """
+        alive = self.gene.nr_products if self.gene is not None else 0
+        kept = len(self.gene.products) if self.gene is not None else 0
+        self.samples.append((self.env.now, len(self.env._queue), alive, kept))
+        self._next_sample = (self.env.now // self.sample_interval + 1) * self.sample_interval
+
+    def summary(self) -> dict:
+        """
+        Return the number of events per type, the steps and wall time per process kind, and the
+        largest event queue and number of products seen.
+        """
+        per_kind = defaultdict(lambda: {'steps': 0, 'wall_time': 0.0})
+        for (kind, _), steps in self.steps.items():
+            per_kind[kind]['steps'] += steps
+        for (kind, _), wall_time in self.wall_time.items():
+            per_kind[kind]['wall_time'] += wall_time
+
+        return {
+            'events': dict(self.events),
+            'processes': dict(per_kind),
+            'wall_time': sum(self.wall_time.values()),
+            'max_queue': max((sample[1] for sample in self.samples), default=0),
+            'max_products': max((sample[2] for sample in self.samples), default=0),
+        }
+
+    def write_collapsed(self, path: str):
+        """
+        Write the wall time (in microseconds) per process kind and event type in the collapsed
+        stack format, which can be read by flamegraph.pl, speedscope, and inferno.
+        """
+        with open(path, 'w') as file:
+            for (kind, event_type), wall_time in sorted(self.wall_time.items()):
+                file.write(f'run_env;{kind};{event_type} {int(round(wall_time * 1e6))}\n')
+
+    def write_chrome_trace(self, path: str):
+        """
+        Write the samples as counters in the chrome trace event format, which can be read by
+        chrome://tracing and perfetto. One microsecond in the trace is one unit of simulated time.
+        """
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': 0,
+                  'args': {'name': 'run_env (simulated time)'}}]
+        for now, queue, alive, kept in self.samples:
+            trace.append({'name': 'event queue', 'ph': 'C', 'ts': now, 'pid': 0,
+                          'args': {'size': queue}})
+            trace.append({'name': 'products', 'ph': 'C', 'ts': now, 'pid': 0,
+                          'args': {'alive': alive, 'kept': kept}})
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms',
+                       'otherData': self.summary()}, file)
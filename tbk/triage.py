@@ -0,0 +1,107 @@
+"""
+Decide before any optimization which genes are fitted, fitted cheaply, or skipped.
+"""
+from collections import namedtuple
+
+import numpy as np
+import scipy.sparse
+
+from .inference import factorial_moments, get_bounds_params3_matrix, moment_based_matrix
+
+# the possible decisions, from least to most severe
+FIT, CHEAP, SKIP = 'fit', 'cheap', 'skip'
+SEVERITY = {FIT: 0, CHEAP: 1, SKIP: 2}
+
+# which decision is made when a gene meets a criterion
+ACTIONS = {
+    'too_few_cells': SKIP,     # less than min_cells (non-missing) values
+    'all_zero': SKIP,          # the gene is not expressed
+    'single_value': SKIP,      # all values are the same
+    'too_few_nonzero': SKIP,   # less than min_nonzero cells express the gene
+    'overdispersed': CHEAP,    # variance / mean is larger than max_dispersion
+    'out_of_bounds': CHEAP,    # moment estimates are a factor max_bound_factor outside the bounds
+}
+
+# decisions per gene, the criteria (name: boolean mask) they are based on, initial parameters, and
+# the factorial moments of each gene (so they don't have to be calculated again, see fit_cost)
+Triage = namedtuple('Triage', ['decisions', 'reasons', 'params', 'moments'], defaults=(None,))
+
+
+def _nonzero(vals) -> np.ndarray:
+    """
+    Count the number of cells that express each row (gene) of a dense or sparse matrix.
+    """
+    if scipy.sparse.issparse(vals):
+        vals = scipy.sparse.csr_matrix(vals, dtype=float)
+        expressed = scipy.sparse.csr_matrix((vals.data > 0, vals.indices, vals.indptr),
+                                            shape=vals.shape)
+        return np.asarray(expressed.sum(axis=1)).ravel()
+    return np.sum(np.asarray(vals, dtype=float) > 0, axis=1)
+
+
+def _nr_vals(vals) -> np.ndarray:
+    """
+    Count the number of non-missing values of each row (gene) of a dense or sparse matrix.
+    """
+    if scipy.sparse.issparse(vals):
+        vals = scipy.sparse.csr_matrix(vals, dtype=float)
+        missing = scipy.sparse.csr_matrix((np.isnan(vals.data), vals.indices, vals.indptr),
+                                          shape=vals.shape)
+        return vals.shape[1] - np.asarray(missing.sum(axis=1)).ravel()
+    return np.sum(~np.isnan(np.asarray(vals, dtype=float)), axis=1)
+
+
+def triage(vals, min_cells: int = 2, min_nonzero: int = 3, max_dispersion: float = 1e3,
+           max_bound_factor: float = 1e2, actions: dict = None) -> Triage:
+    """
+    Decide for every row (gene) of a dense or sparse matrix whether it is fitted, fitted cheaply
+    (see maximum_likelihood's maxiter), or skipped.
+
+    All criteria are evaluated at once for the whole matrix (see ACTIONS for the criteria). The
+    decision of a gene is the most severe action of the criteria it meets, which can be changed by
+    passing a dictionary of criterion: action in actions. The initial parameters of the fits
+    (see get_bounds_params3_matrix) and the factorial moments are returned as well, since they are
+    calculated anyway. The moments are only calculated once.
+    """
+    actions = {**ACTIONS, **(actions or {})}
+    assert set(actions) == set(ACTIONS), f"unknown criteria {set(actions) - set(ACTIONS)}"
+
+    moments = factorial_moments(vals)
+    m_1, m_2, _ = moments.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = m_2 + m_1 - m_1 ** 2
+        dispersion = variance / m_1
+
+    estimates = moment_based_matrix(vals, moments)
+    bounds, params = get_bounds_params3_matrix(vals, estimates)
+    lower, upper = np.array(bounds).T
+    with np.errstate(invalid='ignore'):
+        out_of_bounds = ((estimates > upper * max_bound_factor) |
+                         ((estimates > 0) & (estimates < lower / max_bound_factor))).any(axis=1)
+
+    nr_vals = _nr_vals(vals)
+    nonzero = _nonzero(vals)
+    reasons = {
+        'too_few_cells': nr_vals < min_cells,
+        'all_zero': nonzero == 0,
+        'single_value': (nonzero > 0) & (np.abs(variance) <= 1e-10 * np.maximum(m_1 ** 2, 1)),
+        'too_few_nonzero': nonzero < min_nonzero,
+        'overdispersed': np.nan_to_num(dispersion) > max_dispersion,
+        'out_of_bounds': out_of_bounds,
+    }
+
+    severity = np.zeros(len(nr_vals), dtype=int)
+    for criterion, mask in reasons.items():
+        severity[mask] = np.maximum(severity[mask], SEVERITY[actions[criterion]])
+    decisions = np.array(sorted(SEVERITY, key=SEVERITY.get), dtype=object)[severity]
+
+    return Triage(decisions, reasons, params, moments)
+
+
+def summary(result: Triage) -> dict:
+    """
+    Count how many genes met each criterion, and how many genes got each decision.
+    """
+    counts = {criterion: int(np.sum(mask)) for criterion, mask in result.reasons.items()}
+    counts.update({decision: int(np.sum(result.decisions == decision)) for decision in SEVERITY})
+    return counts
@@ -4,6 +4,8 @@ Tests for the beta poisson module
 
 import unittest
 import numpy as np
+import scipy.special
+import scipy.stats
 import sys
 import os
 sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
@@ -24,6 +26,30 @@ class TestBetaPoisson(unittest.TestCase):
             bp4 = bp.beta_poisson4(2, 3, 1, 1)
             self.assertEqual(bp3, bp4)
 
+    def test_beta_poisson_rng(self):
+        """
+        Test whether sampling with generators with the same seed gives the same values
+        """
+        bp3 = bp.beta_poisson3(2, 3, 10, 100, np.random.default_rng(42))
+        bp4 = bp.beta_poisson4(2, 3, 10, 1, 100, np.random.default_rng(42))
+        self.assertTrue(np.array_equal(bp3, bp4))
+
+    def test_log_likelihood_pmf(self):
+        """
+        Test whether the probabilities match the ones calculated with the scipy poisson pmf
+        """
+        # values that are not non-negative integers have a pmf of zero
+        uniques = np.concatenate([np.arange(0, 60, 3), [1.5, -1]])
+        counts = np.ones(len(uniques))
+        for alpha, beta, lambd in [(2, 3, 10), (0.5, 2, 50), (5, 0.5, 15), (2, 3, 0)]:
+            x, w = scipy.special.j_roots(50, alpha=beta - 1, beta=alpha - 1)
+            expected = np.sum(w * scipy.stats.poisson.pmf(uniques[..., np.newaxis],
+                                                          lambd * (x + 1) / 2), axis=1) \
+                / scipy.special.beta(alpha, beta) / 2 ** (alpha + beta - 1)
+            probs = bp.beta_poisson4_log_likelihood(alpha, beta, lambd, 1.0, uniques, counts,
+                                                    return_sum=False)
+            self.assertTrue(np.allclose(probs, expected, rtol=1e-10, atol=0))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -4,12 +4,16 @@ Tests for the inference of parameters
 
 import unittest
 import numpy as np
+import scipy.sparse
 import sys
 import os
 sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
 
-from tbk.inference import moment_based, maximum_likelihood
+from tbk.batch import differential_kinetics, fit_genes
+from tbk.inference import likelihood_ratio_test, moment_based, moment_based_matrix, \
+    maximum_likelihood, compact_histogram, get_bounds_params3_matrix
 from tbk.bp import beta_poisson3
+from tbk.triage import triage
 
 
 class TestInference(unittest.TestCase):
@@ -19,11 +23,122 @@ class TestInference(unittest.TestCase):
         values = np.array([0, 1, 2, 3, 4])
         self.assertTrue(np.allclose(moment_based(values), np.array([-2, 0, 2])))
 
+    def test_moment_based_matrix(self):
+        """
+        Test whether the matrix version equals moment_based per gene, for dense and sparse input.
+        """
+        np.random.seed(42)
+        values = np.array([beta_poisson3(2, 1, 10, 100) for _ in range(5)] +
+                          [np.zeros(100), np.ones(100)], dtype=float)
+        expected = np.array([moment_based(vals) for vals in values])
+
+        self.assertTrue(np.allclose(moment_based_matrix(values), expected, equal_nan=True))
+        self.assertTrue(np.allclose(moment_based_matrix(scipy.sparse.csr_matrix(values)),
+                                    expected, equal_nan=True))
+
+        # missing values are ignored
+        values[0, :10] = np.nan
+        self.assertTrue(np.allclose(moment_based_matrix(values)[0], moment_based(values[0, 10:])))
+
     def test_ML3(self):
         np.random.seed(42)
         params = np.array([2.32735786, 0.25476861, 7.44452277])
         self.assertTrue(np.allclose(params, maximum_likelihood(beta_poisson3(*params, 500)), 0.5))
 
+    def test_ML3_initial(self):
+        """
+        Test whether a row of get_bounds_params3_matrix can be used as initial parameters
+        """
+        vals = beta_poisson3(2.32735786, 0.25476861, 7.44452277, 500, np.random.default_rng(42))
+        _, params = get_bounds_params3_matrix(vals[np.newaxis])
+        self.assertTrue(np.allclose(maximum_likelihood(vals, initial=params[0]),
+                                    maximum_likelihood(vals, initial=tuple(params[0]))))
+
+    def test_compact_histogram(self):
+        """
+        Test whether counts are stored in the smallest dtype, and other values keep theirs
+        """
+        uniques, counts = compact_histogram(np.array([0., 3., 3., 255.]))
+        self.assertEqual((uniques.dtype, counts.dtype), (np.uint8, np.uint8))
+        self.assertTrue(np.array_equal(uniques, [0, 3, 255]) and np.array_equal(counts, [1, 2, 1]))
+        self.assertEqual(compact_histogram(np.array([0.5, 300]))[0].dtype, np.float64)
+        self.assertEqual(compact_histogram(np.arange(1000))[0].dtype, np.uint16)
+
+    def test_triage(self):
+        """
+        Test whether hopeless genes are skipped, and whether the actions can be configured.
+        """
+        np.random.seed(42)
+        values = np.array([beta_poisson3(2, 1, 10, 100), np.zeros(100), np.ones(100),
+                           np.concatenate([np.zeros(98), [5, 7]])], dtype=float)
+
+        result = triage(values)
+        self.assertEqual(list(result.decisions), ['fit', 'skip', 'skip', 'skip'])
+        self.assertTrue(result.reasons['too_few_nonzero'][3])
+
+        result = triage(values, actions={'too_few_nonzero': 'cheap'})
+        self.assertEqual(result.decisions[3], 'cheap')
+
+    def test_fit_genes(self):
+        """
+        Test whether fit_genes fits every gene like maximum_likelihood, for dense and sparse input.
+        """
+        np.random.seed(42)
+        values = np.array([beta_poisson3(2, 1, 10, 100), beta_poisson3(1, 2, 20, 100),
+                           np.zeros(100)], dtype=float)
+        result = triage(values)
+        expected = np.array([maximum_likelihood(values[0], 'BP3', tuple(result.params[0])),
+                             maximum_likelihood(values[1], 'BP3', tuple(result.params[1])),
+                             [np.nan, np.nan, np.nan]])
+
+        self.assertTrue(np.allclose(fit_genes(values), expected, equal_nan=True))
+        self.assertTrue(np.allclose(fit_genes(scipy.sparse.coo_matrix(values)), expected,
+                                    equal_nan=True))
+
+    def test_fit_genes_cheap(self):
+        """
+        Test whether cheap genes are cut off after cheap_maxiter iterations, but still get estimates
+        """
+        np.random.seed(42)
+        values = np.array([beta_poisson3(2, 1, 10, 100)], dtype=float)
+        result = triage(values, max_dispersion=0)
+        self.assertEqual(list(result.decisions), ['cheap'])
+
+        params = fit_genes(values, result=result, cheap_maxiter=2)
+        self.assertFalse(np.isnan(params).any())
+        self.assertTrue(np.allclose(params[0], maximum_likelihood(
+            values[0], 'BP3', tuple(result.params[0]), 2)))
+        self.assertFalse(np.allclose(params[0], maximum_likelihood(
+            values[0], 'BP3', tuple(result.params[0]))))
+
+    def test_differential_kinetics(self):
+        """
+        Test whether the multi-condition driver gives the same result as likelihood_ratio_test.
+        """
+        np.random.seed(42)
+        conditions = [np.array([beta_poisson3(2, 1, lambd, 100) for _ in range(2)], dtype=float)
+                      for lambd in [10, 20, 10]]
+
+        # missing values are ignored, in both conditions
+        conditions[0][1, :5] = np.nan
+        conditions[1][0, :5] = np.nan
+
+        params, pvalues = differential_kinetics(conditions, [(0, 1), (0, 2)])
+        for condition in [1, 2]:
+            for gene in range(2):
+                theta_1, theta_2, probabilities = likelihood_ratio_test(conditions[0][gene],
+                                                                        conditions[condition][gene])
+                self.assertTrue(np.allclose(params[0, gene], theta_1))
+                self.assertTrue(np.allclose(params[condition, gene], theta_2))
+                self.assertTrue(np.allclose(pvalues[(0, condition)][gene], probabilities))
+                self.assertFalse(np.isnan(pvalues[(0, condition)][gene]).any())
+
+        # sparse input (e.g. coo) gives the same result
+        sparse_params, sparse_pvalues = differential_kinetics(
+            [scipy.sparse.coo_matrix(vals) for vals in conditions], [(0, 1), (0, 2)])
+        self.assertTrue(np.allclose(sparse_params, params))
+        self.assertTrue(np.allclose(sparse_pvalues[(0, 1)], pvalues[(0, 1)]))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,13 +3,19 @@ Tests for the markovian model of gene-product synthesis
 """
 
 import multiprocessing as mp
+import tempfile
 import unittest
 import numpy as np
 import sys
 import os
 sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
 
-from tbk.run import get_products, run_env
+import simpy
+
+from tbk.gene import Gene
+from tbk.rng import spawn
+from tbk.run import get_products, run_env, run_snapshots, stream
+from tbk.trace import Tracer
 
 
 class TestMarkov(unittest.TestCase):
@@ -55,12 +61,74 @@ class TestMarkov(unittest.TestCase):
         # theoretically we expect..
         expected = (lambd * nu) / ((lambd + mu) * delta)
 
-        # the products we have
+        # the products we have, every cell with its own independent stream
         with mp.Pool(processes=12) as pool:
-            products = pool.starmap(get_products, [(lambd, mu, nu, delta) for _ in range(1000)])
+            products = pool.starmap(get_products, [(lambd, mu, nu, delta, 5000, seed)
+                                                   for seed in spawn(42, 1000)])
 
         self.assertTrue(abs(expected - np.mean(products)) < 0.1)
 
+    def test_snapshots(self):
+        """
+        Test whether the snapshots of a long run correspond to the theoretical mean and on-ratio,
+        without keeping the products.
+        """
+        lambd, mu, nu, delta = 2, 4, 3, 1
+        snapshots, gene = run_snapshots(lambd, mu, nu, delta, time=20000, interval=1)
+
+        self.assertEqual(snapshots.shape, (20001, 3))
+        self.assertEqual(gene.products, [])
+        self.assertTrue(abs((lambd * nu) / ((lambd + mu) * delta) - snapshots[:, 2].mean()) < 0.1)
+        self.assertTrue(abs(lambd / (lambd + mu) - snapshots[:, 1].mean()) < 0.05)
+
+    def test_stream_events(self):
+        """
+        Test whether every event snapshot is either a switch or a change of a single product.
+        """
+        env = simpy.Environment()
+        gene = Gene(env, 2, 4, 3, 1, keep_products=False)
+
+        previous = None
+        for snapshot in stream(gene, time=100):
+            if previous is not None:
+                self.assertTrue((snapshot.active != previous.active) ^
+                                (abs(snapshot.products - previous.products) == 1))
+            previous = snapshot
+
+        self.assertEqual(gene.observers, [])
+        self.assertEqual(env.now, 100)
+
+    def test_seed(self):
+        """
+        Test whether runs with the same seed are identical, and runs with another seed are not.
+        """
+        _, gene_1 = run_env(2, 4, 3, 1, time=1000, seed=42)
+        _, gene_2 = run_env(2, 4, 3, 1, time=1000, seed=42)
+        _, gene_3 = run_env(2, 4, 3, 1, time=1000, seed=43)
+
+        self.assertEqual(gene_1.time_on, gene_2.time_on)
+        self.assertEqual([product.start for product in gene_1.products],
+                         [product.start for product in gene_2.products])
+        self.assertNotEqual(gene_1.time_on, gene_3.time_on)
+
+    def test_tracer(self):
+        """
+        Test whether the tracer sees every product that is made and degraded.
+        """
+        tracer = Tracer(sample_interval=10)
+        env, gene = run_env(2, 4, 3, 1, time=1000, tracer=tracer)
+
+        summary = tracer.summary()
+        self.assertEqual(summary['processes']['Product.degradation']['steps'],
+                         len(gene.products) + sum(product.degraded for product in gene.products))
+        # a sample at 0, 10, ..., 1000
+        self.assertEqual(len(tracer.samples), 101)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tracer.write_collapsed(os.path.join(tmpdir, 'trace.txt'))
+            with open(os.path.join(tmpdir, 'trace.txt')) as file:
+                self.assertTrue(all(line.startswith('run_env;') for line in file))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Tests for the scheduling of tasks over workers
+"""
+
+import operator
+import unittest
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
+
+from tbk.schedule import balanced_starmap, chunk, fit_cost
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_chunk(self):
+        """
+        Test whether chunks are ordered longest-first, and whether expensive tasks are on their own.
+        """
+        chunks = chunk([1, 1, 100, 1, 50, 1], nworkers=2, chunks_per_worker=2)
+        self.assertEqual(chunks[0], [2])
+        self.assertEqual(chunks[1], [4])
+        self.assertEqual(sorted(sum(chunks, [])), list(range(6)))
+
+    def test_fit_cost(self):
+        """
+        Test whether genes with more unique values are predicted to be more expensive.
+        """
+        values = np.array([[0, 0, 1, 1], [0, 1, 2, 3], [0, 0, 0, np.nan]])
+        costs = fit_cost(values)
+        self.assertTrue(costs[1] > costs[0] > costs[2])
+
+    def test_balanced_starmap(self):
+        """
+        Test whether the results are returned in the order of the tasks.
+        """
+        tasks = [(i, 2) for i in range(20)]
+        results, report = balanced_starmap(operator.mul, tasks, np.arange(20), nworkers=2)
+        self.assertEqual(results, [2 * i for i in range(20)])
+        self.assertEqual(sum(worker['tasks'] for worker in report['workers'].values()), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
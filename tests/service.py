@@ -0,0 +1,114 @@
+"""
+Tests for the asyncio inference service
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import unittest
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
+
+from tbk.bp import beta_poisson3
+from tbk.inference import maximum_likelihood
+from tbk.service import InferenceService
+
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        self.vals = beta_poisson3(2, 1, 10, 200)
+        self.service = InferenceService(
+            executor=concurrent.futures.ThreadPoolExecutor(max_workers=1),
+            background_executor=concurrent.futures.ThreadPoolExecutor(max_workers=1))
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_deduplicate(self):
+        """
+        Test whether identical requests in flight share a single fit.
+        """
+        async def fit_twice():
+            return await asyncio.gather(self.service.maximum_likelihood(self.vals),
+                                        self.service.maximum_likelihood(self.vals[::-1]))
+
+        params_1, params_2 = asyncio.run(fit_twice())
+        self.assertIs(params_1, params_2)
+        self.assertTrue(np.allclose(params_1, maximum_likelihood(self.vals)))
+        self.assertEqual(self.service.in_flight, {})
+
+    def _blocked(self, scenario):
+        """
+        Run scenario(release) while the (single worker) executor is busy, so new requests stay
+        queued until release is set.
+        """
+        async def run():
+            release = threading.Event()
+            blocker = asyncio.get_running_loop().run_in_executor(self.service.executor,
+                                                                 release.wait)
+            try:
+                return await scenario(release)
+            finally:
+                release.set()
+                await blocker
+                await asyncio.sleep(0)
+
+        return asyncio.run(run())
+
+    def test_cancel(self):
+        """
+        Test whether cancelling the only caller of a queued request cancels the request itself.
+        """
+        async def cancel(_release):
+            task = asyncio.ensure_future(self.service.maximum_likelihood(self.vals))
+            await asyncio.sleep(0.01)
+            (future, _), = self.service.in_flight.values()
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return future
+
+        future = self._blocked(cancel)
+        self.assertTrue(future.cancelled())
+        self.assertEqual(self.service.in_flight, {})
+
+    def test_cancel_shared(self):
+        """
+        Test whether cancelling one of two callers of a request doesn't cancel it for the other.
+        """
+        async def cancel_one(release):
+            task_1 = asyncio.ensure_future(self.service.maximum_likelihood(self.vals))
+            task_2 = asyncio.ensure_future(self.service.maximum_likelihood(self.vals))
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(self.service.in_flight), 1)
+
+            task_1.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task_1
+
+            release.set()
+            return await task_2
+
+        params = self._blocked(cancel_one)
+        self.assertTrue(np.allclose(params, maximum_likelihood(self.vals)))
+        self.assertEqual(self.service.in_flight, {})
+
+    def test_stream(self):
+        """
+        Test whether the point estimate is streamed first, followed by both confidence intervals.
+        """
+        async def collect():
+            return [result async for result in self.service.stream(self.vals)]
+
+        results = asyncio.run(collect())
+        self.assertEqual(results[0][0], 'params')
+        self.assertEqual(sorted(name for name, _ in results[1:]), ['burst_freq', 'burst_size'])
+
+
+if __name__ == '__main__':
+    unittest.main()
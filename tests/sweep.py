@@ -0,0 +1,77 @@
+"""
+Tests for the parameter sweep
+"""
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(f"{os.getcwd()}/."))
+
+from tbk.sweep import parameter_grid, parameter_sweep
+
+RESULTS = ['failed', 'bias k_on', 'bias k_off', 'bias k_syn', 'var k_on', 'var k_off', 'var k_syn']
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_grid(self):
+        """
+        Test whether the grid contains every combination of parameters.
+        """
+        grid = parameter_grid([1, 2], [3], [4, 5], [1])
+        self.assertEqual(grid, [(1, 3, 4, 1), (1, 3, 5, 1), (2, 3, 4, 1), (2, 3, 5, 1)])
+
+    def test_cache(self):
+        """
+        Test whether finished points are reused when the grid is extended.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = os.path.join(tmpdir, 'sweep.csv')
+            kwargs = dict(ncells=50, nreplicates=1, time=10, coverage=False, cache=cache, seed=0)
+
+            first = parameter_sweep(parameter_grid([1], [2], [10]), **kwargs)
+            second = parameter_sweep(parameter_grid([1, 2], [2], [10]), **kwargs)
+
+            self.assertEqual(len(second), 2)
+            self.assertTrue(np.allclose(first[RESULTS].values[0], second[RESULTS].values[0],
+                                        equal_nan=True))
+            self.assertEqual(list(second['lambd']), [1, 2])
+
+    def test_cache_seed(self):
+        """
+        Test whether points finished with another seed, or without a seed, are not reused.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = os.path.join(tmpdir, 'sweep.csv')
+            kwargs = dict(ncells=50, nreplicates=2, time=10, coverage=False, cache=cache)
+            grid = parameter_grid([1], [2], [10])
+
+            first = parameter_sweep(grid, seed=0, **kwargs)
+            parameter_sweep(grid, seed=None, **kwargs)
+            other = parameter_sweep(grid, seed=1, **kwargs)
+            again = parameter_sweep(grid, seed=0, **kwargs)
+
+            self.assertEqual(len(pd.read_csv(cache)), 3)
+            self.assertFalse(np.allclose(first[RESULTS].values, other[RESULTS].values))
+            self.assertTrue(np.allclose(first[RESULTS].values, again[RESULTS].values))
+
+    def test_cache_coverage(self):
+        """
+        Test whether points finished without coverage are not reused when coverage is requested.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = os.path.join(tmpdir, 'sweep.csv')
+            kwargs = dict(ncells=50, nreplicates=1, time=10, cache=cache, seed=0)
+
+            parameter_sweep(parameter_grid([1], [2], [10]), coverage=False, **kwargs)
+            with_coverage = parameter_sweep(parameter_grid([1], [2], [10]), coverage=True, **kwargs)
+
+            self.assertEqual(list(with_coverage['coverage']), [True])
+            self.assertFalse(np.isnan(with_coverage['coverage burst_freq'][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()